@@ -1,3 +1,4 @@
+import collections
 import os
 
 import numpy
@@ -13,6 +14,68 @@ from .makePixelToTanPixel import makePixelToTanPixel
 
 __all__ = ["DetectorWrapper", "CameraWrapper"]
 
+# cache of parsed data files, keyed by (path, modification time)
+_dataFileCache = {}
+
+def _readDataFile(path):
+    """!Read a "|"-delimited data file, returning a tuple of namedtuples (one per row), one field per column
+
+    The parsed rows are cached by path and modification time, so repeated calls are cheap;
+    the rows are shared between callers and must not be modified.
+
+    @param[in] path  path to data file; the first line is a header of the form "#name1|name2|..."
+    """
+    cacheKey = (path, os.path.getmtime(path))
+    rows = _dataFileCache.get(cacheKey)
+    if rows is None:
+        with open(path) as fh:
+            names = fh.readline().rstrip().lstrip("#").split("|")
+            Row = collections.namedtuple("Row", names)
+            rows = tuple(Row(*l.rstrip().split("|")) for l in fh)
+        _dataFileCache[cacheKey] = rows
+    return rows
+
+def _getColumns(rows, names, dtype):
+    """!Return the named columns of rows read by _readDataFile as a NumPy array of shape (num rows, num names)
+
+    @param[in] rows  rows returned by _readDataFile
+    @param[in] names  names of the columns to return
+    @param[in] dtype  data type to which the values are converted (in one pass, by NumPy)
+    """
+    values = numpy.array([[getattr(row, name) for name in names] for row in rows], dtype=str)
+    return values.reshape(len(rows), len(names)).astype(dtype)
+
+def _makeRadialDistortCoeffs(plateScale, radialDistortion):
+    """!Return the coefficients of the FOCAL_PLANE to PUPIL radial distortion polynomial
+
+    @param[in] plateScale  plate scale in arcsec/mm
+    @param[in] radialDistortion  radial distortion, in mm/rad^2
+    """
+    pScaleRad = afwGeom.arcsecToRad(plateScale)
+    return [0.0, 1.0/pScaleRad, 0.0, radialDistortion/pScaleRad]
+
+# PIXELS to ACTUAL_PIXELS transform used by DetectorWrapper (immutable, so it may be shared)
+_pixelsToActualPixels = afwGeom.RadialXYTransform([0, 0.95, 0.01])
+
+# column name prefixes of the amplifier bounding boxes in the amplifier data file, in the order:
+# bbox, raw bbox, raw data bbox, raw horizontal overscan bbox, raw vertical overscan bbox, raw prescan bbox
+_bboxPrefixes = ("trimmed", "raw", "raw_data", "hoscan", "voscan", "pscan")
+
+# read corner of an amplifier, indexed by (flipy << 1) | flipx
+_readCornerLUT = ("LL", "LR", "UL", "UR")
+
+# padding for the linearity coefficients saved in CameraWrapper.ampInfoDict, which has room for
+# third order coefficients while the amplifier data file only provides one
+_unusedLinearityCoeffs = (float("nan"),)*3
+
+# raw XY offset of amplifiers whose raw bboxes have been shifted into place (Extent2I is copied when set)
+_zeroOffset = afwGeom.Extent2I(0, 0)
+
+def _makeBox2I(xmin, ymin, xmax, ymax):
+    """!Make an lsst.afw.geom.Box2I from its inclusive integer corners
+    """
+    return afwGeom.Box2I(afwGeom.Point2I(int(xmin), int(ymin)), afwGeom.Point2I(int(xmax), int(ymax)))
+
 
 class DetectorWrapper(object):
     """!A Detector and the data used to construct it
@@ -79,9 +142,8 @@ class DetectorWrapper(object):
         self.orientation = orientation
 
         # compute TAN_PIXELS transform
-        pScaleRad = afwGeom.arcsecToRad(self.plateScale)
-        radialDistortCoeffs = [0.0, 1.0/pScaleRad, 0.0, self.radialDistortion/pScaleRad]
-        focalPlaneToPupil = afwGeom.RadialXYTransform(radialDistortCoeffs)
+        focalPlaneToPupil = afwGeom.RadialXYTransform(
+            _makeRadialDistortCoeffs(self.plateScale, self.radialDistortion))
         pixelToTanPixel = makePixelToTanPixel(
             bbox = self.bbox,
             orientation = self.orientation,
@@ -93,7 +155,7 @@ class DetectorWrapper(object):
         self.transMap = {
             FOCAL_PLANE: self.orientation.makePixelFpTransform(self.pixelSize),
             CameraSys(TAN_PIXELS, self.name): pixelToTanPixel,
-            CameraSys(ACTUAL_PIXELS, self.name): afwGeom.RadialXYTransform([0, 0.95, 0.01]),
+            CameraSys(ACTUAL_PIXELS, self.name): _pixelsToActualPixels,
         }
         if modFunc:
             modFunc(self)
@@ -131,9 +193,17 @@ class CameraWrapper(object):
         # Info to store for unit tests
         self.plateScale = float(plateScale)
         self.radialDistortion = float(radialDistortion)
+        self.radialDistortCoeffs = _makeRadialDistortCoeffs(self.plateScale, self.radialDistortion)
         self.detectorNameList = []
         self.detectorIdList = []
         self.ampInfoDict = {}
+        # linearity information for each amplifier, as parallel arrays indexed by ampIndexDict
+        self.ampIndexDict = {}
+        self.linCoeffs = None
+        self.linThresh = None
+        self.linMax = None
+        self.linType = []
+        self.linUnits = []
 
         self.camConfig, self.ampCatalogDict = self.makeTestRepositoryItems(isLsstLike)
         self.camera = makeCameraFromCatalogs(self.camConfig, self.ampCatalogDict)
@@ -146,37 +216,31 @@ class CameraWrapper(object):
     def makeDetectorConfigs(self, detFile):
         """!Construct a list of DetectorConfig, one per detector
         """
-        detectors = []
+        detectors = _readDataFile(detFile)
         self.detectorNameList = []
         self.detectorIdList = []
-        with open(detFile) as fh:
-            names = fh.readline().rstrip().lstrip("#").split("|")
-            for l in fh:
-                els = l.rstrip().split("|")
-                detectorProps = dict([(name, el) for name, el in zip(names, els)])
-                detectors.append(detectorProps)
         detectorConfigs = []
         for i, detector in enumerate(detectors):
             detectorId = (i + 1) * 10 # to avoid simple 0, 1, 2...
-            detectorName = detector['name']
+            detectorName = detector.name
             detConfig = DetectorConfig()
             detConfig.name = detectorName
             detConfig.id = detectorId
             detConfig.bbox_x0 = 0
             detConfig.bbox_y0 = 0
-            detConfig.bbox_x1 = int(detector['npix_x']) - 1
-            detConfig.bbox_y1 = int(detector['npix_y']) - 1
-            detConfig.serial = str(detector['serial'])
-            detConfig.detectorType = int(detector['detectorType'])
-            detConfig.offset_x = float(detector['x'])
-            detConfig.offset_y = float(detector['y'])
-            detConfig.refpos_x = float(detector['refPixPos_x'])
-            detConfig.refpos_y = float(detector['refPixPos_y'])
-            detConfig.yawDeg = float(detector['yaw'])
-            detConfig.pitchDeg = float(detector['pitch'])
-            detConfig.rollDeg = float(detector['roll'])
-            detConfig.pixelSize_x = float(detector['pixelSize'])
-            detConfig.pixelSize_y = float(detector['pixelSize'])
+            detConfig.bbox_x1 = int(detector.npix_x) - 1
+            detConfig.bbox_y1 = int(detector.npix_y) - 1
+            detConfig.serial = str(detector.serial)
+            detConfig.detectorType = int(detector.detectorType)
+            detConfig.offset_x = float(detector.x)
+            detConfig.offset_y = float(detector.y)
+            detConfig.refpos_x = float(detector.refPixPos_x)
+            detConfig.refpos_y = float(detector.refPixPos_y)
+            detConfig.yawDeg = float(detector.yaw)
+            detConfig.pitchDeg = float(detector.pitch)
+            detConfig.rollDeg = float(detector.roll)
+            detConfig.pixelSize_x = float(detector.pixelSize)
+            detConfig.pixelSize_y = float(detector.pixelSize)
             detConfig.transposeDetector = False
             detConfig.transformDict.nativeSys = PIXELS.getSysName()
             detectorConfigs.append(detConfig)
@@ -187,113 +251,107 @@ class CameraWrapper(object):
     def makeAmpCatalogs(self, ampFile, isLsstLike=False):
         """!Construct a list of AmpInfoCatalog, one per detector
 
+        Also sets ampInfoDict, and the amplifier linearity information as parallel arrays
+        linCoeffs (shape (num amps, 4)), linThresh, linMax, linType and linUnits,
+        indexed by ampIndexDict[(detector name, amplifier name)].
+
         @param[in] ampFile  path to amplifier data file
         @param[in] isLsstLike  if True then there is one raw image per amplifier;
             if False then there is one raw image per detector
         """
         readoutMap = {'LL':0, 'LR':1, 'UR':2, 'UL':3}
-        amps = []
-        with open(ampFile) as fh:
-            names = fh.readline().rstrip().lstrip("#").split("|")
-            for l in fh:
-                els = l.rstrip().split("|")
-                ampProps = dict([(name, el) for name, el in zip(names, els)])
-                amps.append(ampProps)
+        amps = _readDataFile(ampFile)
         ampTablesDict = {}
         schema = afwTable.AmpInfoTable.makeMinimalSchema()
         linThreshKey = schema.addField('linearityThreshold', type=float)
         linMaxKey = schema.addField('linearityMaximum', type=float)
         linUnitsKey = schema.addField('linearityUnits', type=str, size=9)
         self.ampInfoDict = {}
-        for amp in amps:
-            if amp['ccd_name'] in ampTablesDict:
-                ampCatalog = ampTablesDict[amp['ccd_name']]
-                self.ampInfoDict[amp['ccd_name']]['namps'] += 1
+        self.ampIndexDict = {}
+        self.linType = []
+        self.linUnits = []
+
+        # convert the numeric columns all at once
+        # corners: bounding boxes of each amplifier, as an array of shape (num amps, num bboxes, 4)
+        # where the last axis is (xmin, ymin, xmax, ymax) and the bboxes are in _bboxPrefixes order
+        corners = _getColumns(amps, ["%s_%s" % (prefix, suffix) for prefix in _bboxPrefixes
+                                     for suffix in ("xmin", "ymin", "xmax", "ymax")], int)
+        corners = corners.reshape(len(amps), len(_bboxPrefixes), 4)
+        flipx, flipy = _getColumns(amps, ("flipx", "flipy"), int).astype(bool).T
+        xoffset, yoffset = _getColumns(amps, ("x_offset", "y_offset"), int).T
+        gain, readNoise, linCoeff, linThresh, linMax = \
+            _getColumns(amps, ("gain", "readnoise", "lin_coeffs", "lin_thresh", "lin_max"), float).T
+        if not isLsstLike:
+            # flip the raw bounding boxes within the full raw amplifier bbox, as Box2I.flipLR/flipTB
+            # would, then shift them by the raw offset of the amplifier
+            rawCorners = corners[:, 1:, :]
+            xExt = rawCorners[:, 0, 2] - rawCorners[:, 0, 0] + 1
+            yExt = rawCorners[:, 0, 3] - rawCorners[:, 0, 1] + 1
+            flipped = numpy.empty_like(rawCorners)
+            flipped[:, :, 0] = xExt[:, numpy.newaxis] - rawCorners[:, :, 2] - 1
+            flipped[:, :, 1] = yExt[:, numpy.newaxis] - rawCorners[:, :, 3] - 1
+            flipped[:, :, 2] = xExt[:, numpy.newaxis] - rawCorners[:, :, 0] - 1
+            flipped[:, :, 3] = yExt[:, numpy.newaxis] - rawCorners[:, :, 1] - 1
+            flipMask = numpy.column_stack((flipx, flipy, flipx, flipy))[:, numpy.newaxis, :]
+            rawCorners[:] = numpy.where(flipMask, flipped, rawCorners)
+            rawCorners[:, :, 0::2] += xoffset[:, numpy.newaxis, numpy.newaxis]
+            rawCorners[:, :, 1::2] += yoffset[:, numpy.newaxis, numpy.newaxis]
+
+        for i, amp in enumerate(amps):
+            if amp.ccd_name in ampTablesDict:
+                ampCatalog = ampTablesDict[amp.ccd_name]
+                self.ampInfoDict[amp.ccd_name]['namps'] += 1
             else:
                 ampCatalog = afwTable.AmpInfoCatalog(schema)
-                ampTablesDict[amp['ccd_name']] = ampCatalog
-                self.ampInfoDict[amp['ccd_name']] = {'namps':1, 'linInfo':{}}
+                ampTablesDict[amp.ccd_name] = ampCatalog
+                self.ampInfoDict[amp.ccd_name] = {'namps':1, 'linInfo':{}}
             record = ampCatalog.addNew()
-            bbox = afwGeom.Box2I(afwGeom.Point2I(int(amp['trimmed_xmin']), int(amp['trimmed_ymin'])),
-                             afwGeom.Point2I(int(amp['trimmed_xmax']), int(amp['trimmed_ymax'])))
-            rawBbox = afwGeom.Box2I(afwGeom.Point2I(int(amp['raw_xmin']), int(amp['raw_ymin'])),
-                             afwGeom.Point2I(int(amp['raw_xmax']), int(amp['raw_ymax'])))
-            rawDataBbox = afwGeom.Box2I(afwGeom.Point2I(int(amp['raw_data_xmin']), int(amp['raw_data_ymin'])),
-                             afwGeom.Point2I(int(amp['raw_data_xmax']), int(amp['raw_data_ymax'])))
-            rawHOverscanBbox = afwGeom.Box2I(afwGeom.Point2I(int(amp['hoscan_xmin']), int(amp['hoscan_ymin'])),
-                             afwGeom.Point2I(int(amp['hoscan_xmax']), int(amp['hoscan_ymax'])))
-            rawVOverscanBbox = afwGeom.Box2I(afwGeom.Point2I(int(amp['voscan_xmin']), int(amp['voscan_ymin'])),
-                             afwGeom.Point2I(int(amp['voscan_xmax']), int(amp['voscan_ymax'])))
-            rawPrescanBbox = afwGeom.Box2I(afwGeom.Point2I(int(amp['pscan_xmin']), int(amp['pscan_ymin'])),
-                             afwGeom.Point2I(int(amp['pscan_xmax']), int(amp['pscan_ymax'])))
-            xoffset = int(amp['x_offset'])
-            yoffset = int(amp['y_offset'])
-            flipx = bool(int(amp['flipx']))
-            flipy = bool(int(amp['flipy']))
-            readcorner = 'LL'
-            if not isLsstLike:
-                offext = afwGeom.Extent2I(xoffset, yoffset)
-                if flipx:
-                    xExt = rawBbox.getDimensions().getX()
-                    rawBbox.flipLR(xExt)
-                    rawDataBbox.flipLR(xExt)
-                    rawHOverscanBbox.flipLR(xExt)
-                    rawVOverscanBbox.flipLR(xExt)
-                    rawPrescanBbox.flipLR(xExt)
-                if flipy:
-                    yExt = rawBbox.getDimensions().getY()
-                    rawBbox.flipTB(yExt)
-                    rawDataBbox.flipTB(yExt)
-                    rawHOverscanBbox.flipTB(yExt)
-                    rawVOverscanBbox.flipTB(yExt)
-                    rawPrescanBbox.flipTB(yExt)
-                if not flipx and not flipy:
-                    readcorner = 'LL'
-                elif flipx and not flipy:
-                    readcorner = 'LR'
-                elif flipx and flipy:
-                    readcorner = 'UR'
-                elif not flipx and flipy:
-                    readcorner = 'UL'
-                else:
-                    raise RuntimeError("Couldn't find read corner")
-
-                flipx = False
-                flipy = False
-                rawBbox.shift(offext)
-                rawDataBbox.shift(offext)
-                rawHOverscanBbox.shift(offext)
-                rawVOverscanBbox.shift(offext)
-                rawPrescanBbox.shift(offext)
-                xoffset = 0
-                yoffset = 0
-            offset = afwGeom.Extent2I(xoffset, yoffset)
+            bbox, rawBbox, rawDataBbox, rawHOverscanBbox, rawVOverscanBbox, rawPrescanBbox = \
+                [_makeBox2I(*bboxCorners) for bboxCorners in corners[i]]
+            if isLsstLike:
+                readcorner = 'LL'
+                rawFlipX = bool(flipx[i])
+                rawFlipY = bool(flipy[i])
+                offset = afwGeom.Extent2I(int(xoffset[i]), int(yoffset[i]))
+            else:
+                # the raw bboxes have already been flipped and shifted into place
+                readcorner = _readCornerLUT[(int(flipy[i]) << 1) | int(flipx[i])]
+                rawFlipX = False
+                rawFlipY = False
+                offset = _zeroOffset
             record.setBBox(bbox)
             record.setRawXYOffset(offset)
-            record.setName(str(amp['name']))
+            record.setName(str(amp.name))
             record.setReadoutCorner(readoutMap[readcorner])
-            record.setGain(float(amp['gain']))
-            record.setReadNoise(float(amp['readnoise']))
-            record.setLinearityCoeffs([float(amp['lin_coeffs']),])
-            record.setLinearityType(str(amp['lin_type']))
+            record.setGain(float(gain[i]))
+            record.setReadNoise(float(readNoise[i]))
+            record.setLinearityCoeffs([float(linCoeff[i]),])
+            record.setLinearityType(str(amp.lin_type))
             record.setHasRawInfo(True)
-            record.setRawFlipX(flipx)
-            record.setRawFlipY(flipy)
+            record.setRawFlipX(rawFlipX)
+            record.setRawFlipY(rawFlipY)
             record.setRawBBox(rawBbox)
             record.setRawDataBBox(rawDataBbox)
             record.setRawHorizontalOverscanBBox(rawHOverscanBbox)
             record.setRawVerticalOverscanBBox(rawVOverscanBbox)
             record.setRawPrescanBBox(rawPrescanBbox)
-            record.set(linThreshKey, float(amp['lin_thresh']))
-            record.set(linMaxKey, float(amp['lin_max']))
-            record.set(linUnitsKey, str(amp['lin_units']))
+            record.set(linThreshKey, float(linThresh[i]))
+            record.set(linMaxKey, float(linMax[i]))
+            record.set(linUnitsKey, str(amp.lin_units))
             #The current schema assumes third order coefficients
-            saveCoeffs = (float(amp['lin_coeffs']),)
-            saveCoeffs += (numpy.nan, numpy.nan, numpy.nan)
-            self.ampInfoDict[amp['ccd_name']]['linInfo'][amp['name']] = \
-            {'lincoeffs':saveCoeffs, 'lintype':str(amp['lin_type']),
-             'linthresh':float(amp['lin_thresh']), 'linmax':float(amp['lin_max']),
-             'linunits':str(amp['lin_units'])}
+            saveCoeffs = (float(linCoeff[i]),) + _unusedLinearityCoeffs
+            self.ampInfoDict[amp.ccd_name]['linInfo'][amp.name] = \
+            {'lincoeffs':saveCoeffs, 'lintype':str(amp.lin_type),
+             'linthresh':float(linThresh[i]), 'linmax':float(linMax[i]),
+             'linunits':str(amp.lin_units)}
+            self.ampIndexDict[(amp.ccd_name, amp.name)] = i
+            self.linType.append(str(amp.lin_type))
+            self.linUnits.append(str(amp.lin_units))
+        self.linCoeffs = numpy.empty((len(amps), 4), dtype=numpy.float64)
+        self.linCoeffs[:, 0] = linCoeff
+        self.linCoeffs[:, 1:] = _unusedLinearityCoeffs
+        self.linThresh = numpy.array(linThresh, dtype=numpy.float64)
+        self.linMax = numpy.array(linMax, dtype=numpy.float64)
         return ampTablesDict
 
     def makeTestRepositoryItems(self, isLsstLike=False):
@@ -308,15 +366,14 @@ class CameraWrapper(object):
         ampCatalogDict = self.makeAmpCatalogs(ampFile, isLsstLike=isLsstLike)
         camConfig = CameraConfig()
         camConfig.name = "testCamera%s"%('LSST' if isLsstLike else 'SC')
+        # assign the whole dict at once: one history entry, rather than one per item as update() would add
         camConfig.detectorList = dict((i, detConfig) for i, detConfig in enumerate(detectorConfigs))
         camConfig.plateScale = self.plateScale
-        pScaleRad = afwGeom.arcsecToRad(self.plateScale)
-        radialDistortCoeffs = [0.0, 1.0/pScaleRad, 0.0, self.radialDistortion/pScaleRad]
         tConfig = afwGeom.TransformConfig()
         tConfig.transform.name = 'inverted'
         radialClass = afwGeom.xyTransformRegistry['radial']
         tConfig.transform.active.transform.retarget(radialClass)
-        tConfig.transform.active.transform.coeffs = radialDistortCoeffs
+        tConfig.transform.active.transform.coeffs = self.radialDistortCoeffs
         tmc = afwGeom.TransformMapConfig()
         tmc.nativeSys = FOCAL_PLANE.getSysName()
         tmc.transforms = {PUPIL.getSysName():tConfig}
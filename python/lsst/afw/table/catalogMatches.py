@@ -74,17 +74,44 @@ def copyIntoCatalog(catalog, target, sourceSchema=None, sourcePrefix=None, targe
         sourceSchema = catalog.schema
 
     targetSchema = target.schema
-    target.reserve(len(catalog))
-    for i in range(len(target), len(catalog)):
-        target.addNew()
+    m = makeMapper(sourceSchema, targetSchema, sourcePrefix, targetPrefix)
 
-    if len(catalog) != len(target):
+    if len(target) == 0:
+        # Copy all records in one call; this is done entirely in C++ when catalog is a Catalog
+        # of the same type as target.
+        target.extend(catalog, mapper=m)
+        return
+
+    if len(catalog) < len(target):
         raise RuntimeError("Length mismatch: %d vs %d" % (len(catalog), len(target)))
 
-    m = makeMapper(sourceSchema, targetSchema, sourcePrefix, targetPrefix)
-    for rFrom, rTo in zip(catalog, target):
+    # fill the existing records, then append new records as needed, in a single pass
+    # (assign copies all mapped fields of a record in C++, by key, so there is nothing to gain
+    # from copying the fields individually from Python)
+    numExisting = len(target)
+    target.reserve(len(catalog))
+    for i, rFrom in enumerate(catalog):
+        rTo = target[i] if i < numExisting else target.addNew()
         rTo.assign(rFrom, m)
 
+# Cache of reference catalog name, keyed by the value of the astrometry_net_data directory
+# environment variable (so that a change of setup is noticed)
+_refCatNameCache = {}
+
+def _getRefCatName():
+    """Return the name of the astrometry_net_data reference catalog that is set up, or "NOT_SET"
+    """
+    envValue = os.environ.get("ASTROMETRY_NET_DATA_DIR")
+    catalogName = _refCatNameCache.get(envValue)
+    if catalogName is None:
+        # obtain reference catalog name if one is setup
+        try:
+            catalogName = os.path.basename(getPackageDir("astrometry_net_data"))
+        except:
+            catalogName = "NOT_SET"
+        _refCatNameCache[envValue] = catalogName
+    return catalogName
+
 def matchesToCatalog(matches, matchMeta):
     """Denormalise matches into a Catalog of "unpacked matches"
 
@@ -108,17 +135,16 @@ def matchesToCatalog(matches, matchMeta):
     distKey = mergedSchema.addField("distance", type=float, doc="Distance between ref and src")
 
     mergedCatalog = BaseCatalog(mergedSchema)
-    copyIntoCatalog([m.first for m in matches], mergedCatalog, sourceSchema=refSchema, targetPrefix="ref_")
-    copyIntoCatalog([m.second for m in matches], mergedCatalog, sourceSchema=srcSchema, targetPrefix="src_")
-    for m, r in zip(matches, mergedCatalog):
+    mergedCatalog.reserve(len(matches))
+    refMapper = makeMapper(refSchema, mergedCatalog.schema, targetPrefix="ref_")
+    srcMapper = makeMapper(srcSchema, mergedCatalog.schema, targetPrefix="src_")
+    for m in matches:
+        r = mergedCatalog.addNew()
+        r.assign(m.first, refMapper)
+        r.assign(m.second, srcMapper)
         r.set(distKey, m.distance)
 
-    # obtain reference catalog name if one is setup
-    try:
-        catalogName = os.path.basename(getPackageDir("astrometry_net_data"))
-    except:
-        catalogName = "NOT_SET"
-    matchMeta.add("REFCAT", catalogName)
+    matchMeta.add("REFCAT", _getRefCatName())
     mergedCatalog.getTable().setMetadata(matchMeta)
 
     return mergedCatalog
@@ -133,20 +159,22 @@ def matchesFromCatalog(catalog, sourceSlotConfig=None):
 
     \returns   lsst.afw.table.ReferenceMatch of matches
     """
-    refSchema = makeMergedSchema(catalog.schema, SimpleTable.makeMinimalSchema(), sourcePrefix="ref_")
-    refCatalog = SimpleCatalog(refSchema)
-    copyIntoCatalog(catalog, refCatalog, sourcePrefix="ref_")
+    refMapper = makeMapper(catalog.schema, SimpleTable.makeMinimalSchema(), sourcePrefix="ref_")
+    refCatalog = SimpleCatalog(refMapper.getOutputSchema())
+    refCatalog.extend(catalog, mapper=refMapper)
 
-    srcSchema = makeMergedSchema(catalog.schema, SourceTable.makeMinimalSchema(), sourcePrefix="src_")
-    srcCatalog = SourceCatalog(srcSchema)
-    copyIntoCatalog(catalog, srcCatalog, sourcePrefix="src_")
+    srcMapper = makeMapper(catalog.schema, SourceTable.makeMinimalSchema(), sourcePrefix="src_")
+    srcCatalog = SourceCatalog(srcMapper.getOutputSchema())
+    srcCatalog.extend(catalog, mapper=srcMapper)
 
     if sourceSlotConfig is not None:
         sourceSlotConfig.setupSchema(srcCatalog.schema)
 
-    matches = []
     distKey = catalog.schema.find("distance").key
-    for ref, src, cat in zip(refCatalog, srcCatalog, catalog):
-        matches.append(ReferenceMatch(ref, src, cat[distKey]))
+    if catalog.isContiguous():
+        # fetch all distances at once as a NumPy column
+        distances = catalog.columns[distKey]
+    else:
+        distances = [record.get(distKey) for record in catalog]
 
-    return matches
+    return [ReferenceMatch(ref, src, dist) for ref, src, dist in zip(refCatalog, srcCatalog, distances)]
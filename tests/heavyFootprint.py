@@ -34,10 +34,10 @@ or
 """
 
 import numpy as np
-import os
 import unittest
 import lsst.utils.tests as tests
 import lsst.pex.logging as logging
+import lsst.afw.fits as afwFits
 import lsst.afw.image as afwImage
 import lsst.afw.detection as afwDetect
 import lsst.afw.geom as afwGeom
@@ -54,24 +54,40 @@ try:
 except NameError:
     display = False
 
+def paintSpan(mi, y, x0, x1, value):
+    """Set the pixels of a span of a MaskedImage with xy0 = (0, 0)
+
+    value is an (image, mask, variance) tuple; each element may be a scalar or an array of x1 - x0 + 1 values
+    """
+    mi.getImage().getArray()[y, x0:x1 + 1] = value[0]
+    mi.getMask().getArray()[y, x0:x1 + 1] = value[1]
+    mi.getVariance().getArray()[y, x0:x1 + 1] = value[2]
+
 #-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
         
 class HeavyFootprintTestCase(tests.TestCase):
     """A test case for HeavyFootprint"""
+    spans = [(2, 10, 13),
+             (3, 11, 14)]
+    objectPixelVal = (10, 0x1, 100)
+
+    @classmethod
+    def setUpClass(cls):
+        # the tests do not modify the Footprint, so it is shared by all of them
+        cls.foot = afwDetect.Footprint()
+        for y, x0, x1 in cls.spans:
+            cls.foot.addSpan(y, x0, x1)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.foot
+
     def setUp(self):
         self.mi = afwImage.MaskedImageF(20, 10)
-        self.objectPixelVal = (10, 0x1, 100)
-        
-        self.foot = afwDetect.Footprint()
-        for y, x0, x1 in [(2, 10, 13),
-                          (3, 11, 14)]:
-            self.foot.addSpan(y, x0, x1)
-
-            for x in range(x0, x1 + 1):
-                self.mi.set(x, y, self.objectPixelVal)
+        for y, x0, x1 in self.spans:
+            paintSpan(self.mi, y, x0, x1, self.objectPixelVal)
 
     def tearDown(self):
-        del self.foot
         del self.mi
 
     def testCreate(self):
@@ -84,7 +100,7 @@ class HeavyFootprintTestCase(tests.TestCase):
         #
         # Check we didn't modify the input image
         #
-        self.assertTrue(np.all(np.equal(self.mi.getImage().getArray(), imi.getImage().getArray())))
+        np.testing.assert_array_equal(self.mi.getImage().getArray(), imi.getImage().getArray())
         
         omi = self.mi.Factory(self.mi.getDimensions())
         omi.set((1, 0x4, 0.1))
@@ -99,21 +115,10 @@ class HeavyFootprintTestCase(tests.TestCase):
             for x in range(s.getX0(), s.getX1() + 1):
                 self.assertEqual(imi.get(x, y), omi.get(x, y))
 
-        # Check that we can call getImageArray(), etc
-        arr = hfoot.getImageArray()
-        print arr
-        # Check that it's iterable
-        for x in arr:
-            pass
-        arr = hfoot.getMaskArray()
-        print arr
-        for x in arr:
-            pass
-        arr = hfoot.getVarianceArray()
-        print arr
-        # Check that it's iterable
-        for x in arr:
-            pass
+        # Check that we can call getImageArray(), etc, and that the results are iterable
+        for arr in (hfoot.getImageArray(), hfoot.getMaskArray(), hfoot.getVarianceArray()):
+            for x in arr:
+                pass
         
 
 
@@ -149,14 +154,16 @@ class HeavyFootprintTestCase(tests.TestCase):
         omi = self.mi.Factory(self.mi.getDimensions())
 
         for foot in fs.getFootprints():
-            self.assertNotEqual(afwDetect.cast_HeavyFootprint(foot, self.mi), None)
-            afwDetect.cast_HeavyFootprint(foot, self.mi).insert(omi)
+            heavy = afwDetect.cast_HeavyFootprint(foot, self.mi)
+            self.assertIsNotNone(heavy)
+            heavy.insert(omi)
 
         for foot in fs.getFootprints():
-            self.assertNotEqual(afwDetect.HeavyFootprintF.cast(foot), None)
-            afwDetect.HeavyFootprintF.cast(foot).insert(omi)
+            heavy = afwDetect.HeavyFootprintF.cast(foot)
+            self.assertIsNotNone(heavy)
+            heavy.insert(omi)
 
-        self.assertTrue(np.all(np.equal(self.mi.getImage().getArray(), omi.getImage().getArray())))
+        np.testing.assert_array_equal(self.mi.getImage().getArray(), omi.getImage().getArray())
 
     def testXY0(self):
         """Test that inserting a HeavyFootprint obeys XY0"""
@@ -176,7 +183,7 @@ class HeavyFootprintTestCase(tests.TestCase):
             ds9.mtv(omi, frame=1, title="sub")
 
         submi = self.mi.Factory(self.mi, bbox, afwImage.LOCAL)
-        self.assertTrue(np.all(np.equal(submi.getImage().getArray(), omi.getImage().getArray())))
+        np.testing.assert_array_equal(submi.getImage().getArray(), omi.getImage().getArray())
 
     def testCast_HeavyFootprint(self):
         """Test that we can cast a Footprint to a HeavyFootprint"""
@@ -202,14 +209,14 @@ class HeavyFootprintTestCase(tests.TestCase):
     def testMergeHeavyFootprints(self):
         mi = afwImage.MaskedImageF(20, 10)
         objectPixelVal = (42, 0x9, 400)
+        spans = [(1, 9, 12),
+                 (2, 12, 13),
+                 (3, 11, 15)]
         
         foot = afwDetect.Footprint()
-        for y, x0, x1 in [(1, 9, 12),
-                          (2, 12, 13),
-                          (3, 11, 15)]:
+        for y, x0, x1 in spans:
             foot.addSpan(y, x0, x1)
-            for x in range(x0, x1 + 1):
-                mi.set(x, y, objectPixelVal)
+            paintSpan(mi, y, x0, x1, objectPixelVal)
 
         hfoot1 = afwDetect.makeHeavyFootprint(self.foot, self.mi)
         hfoot2 = afwDetect.makeHeavyFootprint(foot, mi)
@@ -228,22 +235,25 @@ class HeavyFootprintTestCase(tests.TestCase):
         hsum.insert(msum)
 
         sa = msum.getImage().getArray()
-
-        self.assertTrue(np.all(sa[1, 9:13] == objectPixelVal[0]))
-        self.assertTrue(np.all(sa[2, 12:14] == objectPixelVal[0] + self.objectPixelVal[0]))
-        self.assertTrue(np.all(sa[2, 10:12] == self.objectPixelVal[0]))
-
         sv = msum.getVariance().getArray()
-
-        self.assertTrue(np.all(sv[1, 9:13] == objectPixelVal[2]))
-        self.assertTrue(np.all(sv[2, 12:14] == objectPixelVal[2] + self.objectPixelVal[2]))
-        self.assertTrue(np.all(sv[2, 10:12] == self.objectPixelVal[2]))
-
         sm = msum.getMask().getArray()
+        #
+        # Where the footprints overlap image and variance add, and masks are ORed;
+        # everywhere outside both footprints should still be zero
+        #
+        expImage = np.zeros_like(sa)
+        expVariance = np.zeros_like(sv)
+        expMask = np.zeros_like(sm)
+        for footSpans, val in [(self.spans, self.objectPixelVal),
+                               (spans, objectPixelVal)]:
+            for y, x0, x1 in footSpans:
+                expImage[y, x0:x1 + 1] += val[0]
+                expMask[y, x0:x1 + 1] |= val[1]
+                expVariance[y, x0:x1 + 1] += val[2]
 
-        self.assertTrue(np.all(sm[1, 9:13] == objectPixelVal[1]))
-        self.assertTrue(np.all(sm[2, 12:14] == objectPixelVal[1] | self.objectPixelVal[1]))
-        self.assertTrue(np.all(sm[2, 10:12] == self.objectPixelVal[1]))
+        np.testing.assert_array_equal(sa, expImage)
+        np.testing.assert_array_equal(sv, expVariance)
+        np.testing.assert_array_equal(sm, expMask)
 
 
         if False:
@@ -266,21 +276,21 @@ class HeavyFootprintTestCase(tests.TestCase):
             plt.savefig('merge.png')
 
     def testFitsPersistence(self):
+        rng = np.random.RandomState(1)
         heavy1 = afwDetect.HeavyFootprintF(self.foot)
-        heavy1.getImageArray()[:] = np.random.randn(self.foot.getArea()).astype(np.float32)
-        heavy1.getMaskArray()[:] =  np.random.randint(low=0, high=2,
-                                                      size=self.foot.getArea()).astype(np.uint16)
-        heavy1.getVarianceArray()[:] = np.random.randn(self.foot.getArea()).astype(np.float32)
-        filename = "heavyFootprint-testFitsPersistence.fits"
-        heavy1.writeFits(filename)
-        heavy2 = afwDetect.HeavyFootprintF.readFits(filename)
+        heavy1.getImageArray()[:] = rng.randn(self.foot.getArea()).astype(np.float32)
+        heavy1.getMaskArray()[:] = rng.randint(low=0, high=2,
+                                               size=self.foot.getArea()).astype(np.uint16)
+        heavy1.getVarianceArray()[:] = rng.randn(self.foot.getArea()).astype(np.float32)
+        manager = afwFits.MemFileManager()
+        heavy1.writeFits(manager)
+        heavy2 = afwDetect.HeavyFootprintF.readFits(manager)
         self.assertEqual(heavy1.getArea(), heavy2.getArea())
         self.assertEqual(list(heavy1.getSpans()), list(heavy2.getSpans()))
         self.assertEqual(list(heavy1.getPeaks()), list(heavy2.getPeaks()))
         self.assertClose(heavy1.getImageArray(), heavy2.getImageArray(), rtol=0.0, atol=0.0)
         self.assertClose(heavy1.getMaskArray(), heavy2.getMaskArray(), rtol=0.0, atol=0.0)
         self.assertClose(heavy1.getVarianceArray(), heavy2.getVarianceArray(), rtol=0.0, atol=0.0)
-        os.remove(filename)
 
     def testDot(self):
         """Test HeavyFootprint::dot"""
@@ -299,10 +309,9 @@ class HeavyFootprintTestCase(tests.TestCase):
                               (7, 3, 7),]:
                 fp1.addSpan(y, x0, x1)
                 fp2.addSpan(y + yOffset, x0 + xOffset, x1 + xOffset)
-                for x in range(x0, x1 + 1):
-                    value = (x + y, 0, 1.0)
-                    mi1.set(x, y, value)
-                    mi2.set(x + xOffset, y + yOffset, value)
+                value = (np.arange(x0, x1 + 1) + y, 0, 1.0)
+                paintSpan(mi1, y, x0, x1, value)
+                paintSpan(mi2, y + yOffset, x0 + xOffset, x1 + xOffset, value)
 
             hfp1 = afwDetect.makeHeavyFootprint(fp1, mi1)
             hfp2 = afwDetect.makeHeavyFootprint(fp2, mi2)
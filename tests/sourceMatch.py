@@ -293,6 +293,62 @@ class SourceMatchTestCase(unittest.TestCase):
             noMatches = afwTable.matchRaDec(catMismatches, cat2, 1.0*afwGeom.arcseconds, mc)
             self.assertEqual(len(noMatches), 0)
 
+    def testCopyIntoCatalogNonEmpty(self):
+        """Check that copyIntoCatalog fills the existing records of the target and appends the rest
+        """
+        self.fillCopySource(10)
+        for numExisting in (3, len(self.ss1)):
+            target = self.makeCopyTarget(numExisting)
+            afwTable.catalogMatches.copyIntoCatalog(self.ss1, target, targetPrefix="src_")
+            self.checkCopy(self.ss1, target)
+
+        target = self.makeCopyTarget(len(self.ss1) + 1)
+        self.assertRaises(RuntimeError, afwTable.catalogMatches.copyIntoCatalog, self.ss1, target,
+                          targetPrefix="src_")
+
+    def testCopyIntoCatalogEmpty(self):
+        """Check that copyIntoCatalog copies into an empty target from a catalog or a list of records
+        """
+        self.fillCopySource(10)
+        # a catalog of the same type as the target is copied in one call to C++
+        source = afwTable.BaseCatalog(self.ss1.schema)
+        source.extend(self.ss1, deep=True)
+        target = self.makeCopyTarget()
+        afwTable.catalogMatches.copyIntoCatalog(source, target, targetPrefix="src_")
+        self.checkCopy(self.ss1, target)
+
+        # any other iterable of records is copied one record at a time
+        target = self.makeCopyTarget()
+        afwTable.catalogMatches.copyIntoCatalog(list(self.ss1), target, sourceSchema=self.ss1.schema,
+                                                targetPrefix="src_")
+        self.checkCopy(self.ss1, target)
+
+    def fillCopySource(self, nobj):
+        """Add nobj records with distinct ids and fluxes to self.ss1
+        """
+        for i in range(nobj):
+            s = self.ss1.addNew()
+            s.setId(i + 1)
+            s.set("flux_flux", 100.0*(i + 1))
+
+    def makeCopyTarget(self, nobj=0):
+        """Return a BaseCatalog with the fields of self.table prefixed by "src_" and nobj new records
+        """
+        schema = afwTable.catalogMatches.makeMergedSchema(self.table.getSchema(), afwTable.Schema(),
+                                                          targetPrefix="src_")
+        target = afwTable.BaseCatalog(schema)
+        for i in range(nobj):
+            target.addNew()
+        return target
+
+    def checkCopy(self, source, target):
+        """Check that target holds the values of source, with field names prefixed by "src_"
+        """
+        self.assertEqual(len(source), len(target))
+        for s, t in zip(source, target):
+            self.assertEqual(s.getId(), t["src_id"])
+            self.assertEqual(s.get("flux_flux"), t["src_flux_flux"])
+
     def checkPickle(self, matches, checkSlots=True):
         """Check that a match list pickles
 
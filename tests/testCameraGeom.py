@@ -71,7 +71,7 @@ class CameraGeomTestCase(unittest.TestCase):
             for det in cw.camera:
                 self.assertTrue(isinstance(det, Detector))
                 self.assertEqual(cw.ampInfoDict[det.getName()]['namps'], len(det))
-            
+
     def testMakeCameraPoint(self):
         point = afwGeom.Point2D(0,0)
         for cw in self.cameraList:
@@ -264,6 +264,23 @@ class CameraGeomTestCase(unittest.TestCase):
                         if numpy.isfinite(c1) and numpy.isfinite(c2):
                             self.assertEquals(c1, c2)
 
+    def testLinearityArrays(self):
+        """Test that the linearity arrays saved by CameraWrapper match the amplifier records"""
+        for cw in self.cameraList:
+            camera = cw.camera
+            numAmps = sum(len(det) for det in camera)
+            self.assertEqual(len(cw.ampIndexDict), numAmps)
+            self.assertEqual(cw.linCoeffs.shape, (numAmps, 4))
+            for det in camera:
+                for amp in det:
+                    i = cw.ampIndexDict[(det.getName(), amp.getName())]
+                    self.assertEquals(cw.linCoeffs[i, 0], amp.getLinearityCoeffs()[0])
+                    self.assertTrue(numpy.isnan(cw.linCoeffs[i, 1:]).all())
+                    self.assertEquals(cw.linThresh[i], amp.get('linearityThreshold'))
+                    self.assertEquals(cw.linMax[i], amp.get('linearityMaximum'))
+                    self.assertEquals(cw.linType[i], amp.getLinearityType())
+                    self.assertEquals(cw.linUnits[i], amp.get('linearityUnits'))
+
     def testAssembly(self):
         ccdNames = ('R:0,0 S:1,0', 'R:0,0 S:0,1')
         compMap = {True:afwImage.ImageU('tests/test_comp_trimmed.fits.gz'), False:afwImage.ImageU('tests/test_comp.fits.gz')}
@@ -24,6 +24,7 @@ from __future__ import absolute_import, division
 """
 Tests for lsst.afw.cameraGeom.CameraSys and CameraSysPrefix
 """
+import itertools
 import unittest
 
 import lsst.utils.tests
@@ -33,50 +34,56 @@ class CameraSysTestCase(unittest.TestCase):
     def testBasics(self):
         """Test CameraSys and CameraSysPrefix
         """
-        for sysName in ("pupil", "pixels"):
-            for detectorName in ("", "det1", "det2"):
-                cameraSys = cameraGeom.CameraSys(sysName, detectorName)
-                self.assertEquals(cameraSys.getSysName(), sysName)
-                self.assertEquals(cameraSys.getDetectorName(), detectorName)
-                self.assertEquals(cameraSys.hasDetectorName(), bool(detectorName))
-
-                noDetSys = cameraGeom.CameraSys(sysName)
-                self.assertEquals(noDetSys.getSysName(), sysName)
-                self.assertEquals(noDetSys.getDetectorName(), "")
-                self.assertFalse(noDetSys.hasDetectorName())
-
-                camSysPrefix = cameraGeom.CameraSysPrefix(sysName)
-                self.assertEquals(camSysPrefix.getSysName(), sysName)
-
-                if detectorName:
-                    self.assertFalse(cameraSys == noDetSys)
-                    self.assertTrue(cameraSys != noDetSys)
-                else:
-                    self.assertTrue(cameraSys == noDetSys)
-                    self.assertFalse(cameraSys != noDetSys)
-
-                self.assertTrue(cameraSys != camSysPrefix)
-                self.assertTrue(noDetSys != camSysPrefix)
-                self.assertFalse(cameraSys == camSysPrefix)
-                self.assertFalse(noDetSys == camSysPrefix)
-
-            for sysName2 in ("pupil", "pixels"):
-                for detectorName2 in ("", "det1", "det2"):
-                    cameraSys2 = cameraGeom.CameraSys(sysName2, detectorName2)
-                    if sysName == sysName2 and detectorName == detectorName2:
-                        self.assertTrue(cameraSys == cameraSys2)
-                        self.assertFalse(cameraSys != cameraSys2)
-                    else:
-                        self.assertFalse(cameraSys == cameraSys2)
-                        self.assertTrue(cameraSys != cameraSys2)
-
-                    camSysPrefix2 = cameraGeom.CameraSysPrefix(sysName2)
-                    if sysName2 == sysName:
-                        self.assertTrue(camSysPrefix2 == camSysPrefix)
-                        self.assertFalse(camSysPrefix2 != camSysPrefix)
-                    else:
-                        self.assertFalse(camSysPrefix2 == camSysPrefix)
-                        self.assertTrue(camSysPrefix2 != camSysPrefix)
+        sysNames = ("pupil", "pixels")
+        detectorNames = ("", "det1", "det2")
+        keys = list(itertools.product(sysNames, detectorNames))
+        cameraSysDict = dict((key, cameraGeom.CameraSys(*key)) for key in keys)
+        camSysPrefixDict = dict((sysName, cameraGeom.CameraSysPrefix(sysName)) for sysName in sysNames)
+
+        for sysName, detectorName in keys:
+            cameraSys = cameraSysDict[(sysName, detectorName)]
+            self.assertEquals(cameraSys.getSysName(), sysName)
+            self.assertEquals(cameraSys.getDetectorName(), detectorName)
+            self.assertEquals(cameraSys.hasDetectorName(), bool(detectorName))
+
+            noDetSys = cameraGeom.CameraSys(sysName)
+            self.assertEquals(noDetSys.getSysName(), sysName)
+            self.assertEquals(noDetSys.getDetectorName(), "")
+            self.assertFalse(noDetSys.hasDetectorName())
+
+            camSysPrefix = camSysPrefixDict[sysName]
+            self.assertEquals(camSysPrefix.getSysName(), sysName)
+
+            if detectorName:
+                self.assertFalse(cameraSys == noDetSys)
+                self.assertTrue(cameraSys != noDetSys)
+            else:
+                self.assertTrue(cameraSys == noDetSys)
+                self.assertFalse(cameraSys != noDetSys)
+
+            self.assertTrue(cameraSys != camSysPrefix)
+            self.assertTrue(noDetSys != camSysPrefix)
+            self.assertFalse(cameraSys == camSysPrefix)
+            self.assertFalse(noDetSys == camSysPrefix)
+
+        for (sysName, detectorName), (sysName2, detectorName2) in itertools.product(keys, repeat=2):
+            cameraSys = cameraSysDict[(sysName, detectorName)]
+            cameraSys2 = cameraSysDict[(sysName2, detectorName2)]
+            if sysName == sysName2 and detectorName == detectorName2:
+                self.assertTrue(cameraSys == cameraSys2)
+                self.assertFalse(cameraSys != cameraSys2)
+            else:
+                self.assertFalse(cameraSys == cameraSys2)
+                self.assertTrue(cameraSys != cameraSys2)
+
+            camSysPrefix = camSysPrefixDict[sysName]
+            camSysPrefix2 = camSysPrefixDict[sysName2]
+            if sysName2 == sysName:
+                self.assertTrue(camSysPrefix2 == camSysPrefix)
+                self.assertFalse(camSysPrefix2 != camSysPrefix)
+            else:
+                self.assertFalse(camSysPrefix2 == camSysPrefix)
+                self.assertTrue(camSysPrefix2 != camSysPrefix)
 
     def testRepr(self):
         """Test __repr__
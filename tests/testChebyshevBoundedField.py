@@ -1,4 +1,5 @@
-#!/usr/bin/env python
+#!/usr/bin/env python2
+from __future__ import absolute_import, division
 #
 # LSST Data Management System
 # Copyright 2008, 2009, 2010 LSST Corporation.
@@ -31,12 +32,13 @@ or
    >>> import testSchema; testSchema.run()
 """
 
-import os
+import sys
 import unittest
 import numpy
 import lsst.utils.tests
 import lsst.pex.exceptions
 import lsst.afw.geom
+import lsst.afw.fits
 import lsst.afw.math
 
 try:
@@ -44,48 +46,95 @@ try:
 except NameError:
     display = False
 
-numpy.random.seed(5)
-
-CHEBYSHEV_T = [
-    lambda x: x**0,
-    lambda x: x,
-    lambda x: 2*x**2 - 1,
-    lambda x: (4*x**2 - 3)*x,
-    lambda x: (8*x**2 - 8)*x**2 + 1,
-    lambda x: ((16*x**2 - 20)*x**2 + 5)*x,
-    ]
+def chebyshevBasis(x, order):
+    """Return the 1-d Chebyshev polynomials T_0 ... T_order evaluated at x, as an array of shape
+    (order + 1, x.size), using the recurrence T_{k+1}(x) = 2 x T_k(x) - T_{k-1}(x)
+    """
+    result = numpy.empty((order + 1, x.size), dtype=float)
+    result[0] = 1.0
+    if order > 0:
+        result[1] = x
+    for k in range(1, order):
+        result[k + 1] = 2.0*x*result[k] - result[k - 1]
+    return result
+
+def evaluateChebyshev2d(coefficients, x, y):
+    """Return sum_ij coefficients[i, j] T_j(x) T_i(y) at each point (x, y), for x and y in [-1, 1]
+    """
+    tx = chebyshevBasis(x, coefficients.shape[1] - 1)
+    ty = chebyshevBasis(y, coefficients.shape[0] - 1)
+    # sum over i and j for all points at once
+    return numpy.einsum('ij,jn,in->n', coefficients, tx, ty)
+
+# (orderX, orderY) of the test cases: every order from 0 to 4 in each dimension,
+# with equal orders and with either order the larger one
+ORDER_PAIRS = [(0, 0), (1, 0), (0, 2), (2, 2), (1, 3), (3, 4), (4, 1), (4, 4)]
 
 #-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
 
 class ChebyshevBoundedFieldTestCase(lsst.utils.tests.TestCase):
 
-    def setUp(self):
-        self.bbox = lsst.afw.geom.Box2I(lsst.afw.geom.Point2I(-5, -5), lsst.afw.geom.Point2I(5, 5))
-        self.x1d = numpy.linspace(self.bbox.getBeginX(), self.bbox.getEndX())
-        self.y1d = numpy.linspace(self.bbox.getBeginY(), self.bbox.getEndY())
-        self.x2d, self.y2d = numpy.meshgrid(self.x1d, self.y1d)
-        self.xFlat = numpy.ravel(self.x2d)
-        self.yFlat = numpy.ravel(self.y2d)
-        self.cases = []
-        for orderX in range(0, 5):
-            for orderY in range(0, 5):
-                indexX, indexY = numpy.meshgrid(numpy.arange(orderX+1, dtype=int),
-                                                numpy.arange(orderY+1, dtype=int))
-                for triangular in (True, False):
-                    ctrl = lsst.afw.math.ChebyshevBoundedFieldControl()
-                    ctrl.orderX = orderX
-                    ctrl.orderY = orderY
-                    ctrl.triangular = triangular
-                    coefficients = numpy.random.randn(orderY+1, orderX+1)
-                    if triangular:
-                        coefficients[indexX + indexY > max(orderX, orderY)] = 0.0
-                    self.cases.append((ctrl, coefficients))
-
-    def tearDown(self):
-        del self.bbox
+    # bounding box of the fields under test and of the points at which they are evaluated
+    bbox = lsst.afw.geom.Box2I(lsst.afw.geom.Point2I(-5, -5), lsst.afw.geom.Point2I(5, 5))
+
+    @classmethod
+    def setUpClass(cls):
+        # the cases are not modified by the tests, so build them once for all tests
+        # use our own generator, rather than seeding the global one shared with other tests
+        rng = numpy.random.RandomState(5)
+        # a 12x12 grid is plenty to constrain fits up to 4th order in x and y
+        cls.x1d = numpy.linspace(cls.bbox.getBeginX(), cls.bbox.getEndX(), 12)
+        cls.y1d = numpy.linspace(cls.bbox.getBeginY(), cls.bbox.getEndY(), 12)
+        cls.x2d, cls.y2d = numpy.meshgrid(cls.x1d, cls.y1d)
+        cls.xFlat = numpy.ravel(cls.x2d)
+        cls.yFlat = numpy.ravel(cls.y2d)
+        cls.cases = []
+        for orderX, orderY in ORDER_PAIRS:
+            # coefficients that must be zero for a triangular field: [i, j] with i + j > max(orderX, orderY)
+            indexSum = numpy.add.outer(numpy.arange(orderY+1), numpy.arange(orderX+1))
+            triangularMask = indexSum > max(orderX, orderY)
+            for triangular in (True, False):
+                ctrl = lsst.afw.math.ChebyshevBoundedFieldControl()
+                ctrl.orderX = orderX
+                ctrl.orderY = orderY
+                ctrl.triangular = triangular
+                coefficients = rng.randn(orderY+1, orderX+1)
+                if triangular:
+                    coefficients[triangularMask] = 0.0
+                cls.cases.append((ctrl, coefficients))
+        # random points at which to evaluate the fields
+        boxD = lsst.afw.geom.Box2D(cls.bbox)
+        nPoints = 50
+        cls.xSample = rng.rand(nPoints)*boxD.getWidth() + boxD.getMinX()
+        cls.ySample = rng.rand(nPoints)*boxD.getHeight() + boxD.getMinY()
+        # weights for the grid points, for fits of weighted data
+        cls.weights = 1.0 + rng.randn(cls.xFlat.size)**2
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.x1d
+        del cls.y1d
+        del cls.x2d
+        del cls.y2d
+        del cls.xFlat
+        del cls.yFlat
+        del cls.cases
+        del cls.xSample
+        del cls.ySample
+        del cls.weights
+
+    def quickClose(self, a, b, rtol=sys.float_info.epsilon, atol=sys.float_info.epsilon):
+        """Assert that a and b are close, as assertClose does, but only call assertClose
+        (with its detailed failure reporting) if a cheap numpy.allclose check fails
+
+        numpy.allclose accepts differences up to atol + rtol*|b|, while assertClose only accepts
+        differences up to max(atol, rtol*max(|a|, |b|)), so the cheap check uses half of each tolerance.
+        """
+        if not numpy.allclose(a, b, rtol=0.5*rtol, atol=0.5*atol):
+            self.assertClose(a, b, rtol=rtol, atol=atol)
 
     def testEvaluate(self):
-        """Test the single-point evaluate method against explicitly-defined 1-d Chebyshevs
+        """Test the single-point evaluate method against the reference evaluateChebyshev2d
         (at the top of this file).
         """
         factor = 12.345
@@ -93,18 +142,12 @@ class ChebyshevBoundedFieldTestCase(lsst.utils.tests.TestCase):
         # sx, sy: transform from self.bbox range to [-1, -1]
         sx = 2.0 / boxD.getWidth()
         sy = 2.0 / boxD.getHeight()
-        nPoints = 50
+        x = self.xSample
+        y = self.ySample
         for ctrl, coefficients in self.cases:
             field = lsst.afw.math.ChebyshevBoundedField(self.bbox, coefficients)
-            x = numpy.random.rand(nPoints)*boxD.getWidth() + boxD.getMinX()
-            y = numpy.random.rand(nPoints)*boxD.getHeight() + boxD.getMinY()
             z1 = field.evaluate(x, y)
-            tx = numpy.array([CHEBYSHEV_T[i](sx*x) for i in range(coefficients.shape[1])])
-            ty = numpy.array([CHEBYSHEV_T[i](sy*y) for i in range(coefficients.shape[0])])
-            assert tx.shape == (coefficients.shape[1], x.size)
-            assert ty.shape == (coefficients.shape[0], y.size)
-            z2 = numpy.array([numpy.dot(ty[:,i], numpy.dot(coefficients, tx[:,i]))
-                              for i in range(nPoints)])
+            z2 = evaluateChebyshev2d(coefficients, sx*x, sy*y)
             self.assertClose(z1, z2, rtol=1E-13)
 
             scaled = lsst.afw.math.ChebyshevBoundedField.cast(field*factor)
@@ -115,13 +158,14 @@ class ChebyshevBoundedFieldTestCase(lsst.utils.tests.TestCase):
         """Test that we can fit an image produced by a ChebyshevBoundedField and
         get the same coefficients back.
         """
+        # fillImage sets every pixel, so the images can be reused for all cases
+        images = [Image(self.bbox) for Image in (lsst.afw.image.ImageF, lsst.afw.image.ImageD)]
         for ctrl, coefficients in self.cases:
             inField = lsst.afw.math.ChebyshevBoundedField(self.bbox, coefficients)
-            for Image in (lsst.afw.image.ImageF, lsst.afw.image.ImageD):
-                image = Image(self.bbox)
+            for image in images:
                 inField.fillImage(image)
                 outField = lsst.afw.math.ChebyshevBoundedField.fit(image, ctrl)
-                self.assertClose(outField.getCoefficients(), coefficients, rtol=1E-6, atol=1E-7)
+                self.quickClose(outField.getCoefficients(), coefficients, rtol=1E-6, atol=1E-7)
 
     def testArrayFit(self):
         """Test that we can fit 1-d arrays produced by a ChebyshevBoundedField and
@@ -133,33 +177,29 @@ class ChebyshevBoundedFieldTestCase(lsst.utils.tests.TestCase):
                 array = inField.evaluate(self.xFlat, self.yFlat)
                 outField1 = lsst.afw.math.ChebyshevBoundedField.fit(self.bbox, self.xFlat, self.yFlat,
                                                                     array, ctrl)
-                self.assertClose(outField1.getCoefficients(), coefficients, rtol=1E-6, atol=1E-7)
-                weights = (1.0 + numpy.random.randn(array.size)**2)
+                self.quickClose(outField1.getCoefficients(), coefficients, rtol=1E-6, atol=1E-7)
                 # Should get same results with different weights, since we still have no noise
                 # and a model that can exactly reproduce the data.
                 outField2 = lsst.afw.math.ChebyshevBoundedField.fit(self.bbox, self.xFlat, self.yFlat,
-                                                                    array, weights, ctrl)
-                self.assertClose(outField2.getCoefficients(), coefficients, rtol=1E-7, atol=1E-7)
+                                                                    array, self.weights, ctrl)
+                self.quickClose(outField2.getCoefficients(), coefficients, rtol=1E-7, atol=1E-7)
 
     def testPersistence(self):
-        """Test that we can fit 1-d arrays produced by a ChebyshevBoundedField and
-        get the same coefficients back.
+        """Test that a ChebyshevBoundedField read back from FITS has the same bbox and coefficients,
+        and evaluates to the same values, as the field that was written.
         """
-        filename = "testChebyshevBoundedField.fits"
-        boxD = lsst.afw.geom.Box2D(self.bbox)
-        nPoints = 50
+        x = self.xSample
+        y = self.ySample
         for ctrl, coefficients in self.cases:
             inField = lsst.afw.math.ChebyshevBoundedField(self.bbox, coefficients)
-            inField.writeFits(filename)
-            outField = lsst.afw.math.ChebyshevBoundedField.readFits(filename)
+            manager = lsst.afw.fits.MemFileManager()
+            inField.writeFits(manager)
+            outField = lsst.afw.math.ChebyshevBoundedField.readFits(manager)
             self.assertEqual(inField.getBBox(), outField.getBBox())
-            self.assertClose(inField.getCoefficients(), outField.getCoefficients())
-            x = numpy.random.rand(nPoints)*boxD.getWidth() + boxD.getMinX()
-            y = numpy.random.rand(nPoints)*boxD.getHeight() + boxD.getMinY()
+            self.quickClose(inField.getCoefficients(), outField.getCoefficients())
             z1 = inField.evaluate(x, y)
-            z2 = inField.evaluate(x, y)
-            self.assertClose(z1, z2, rtol=1E-13)
-        os.remove(filename)
+            z2 = outField.evaluate(x, y)
+            self.quickClose(z1, z2, rtol=1E-13)
 
     def testTruncate(self):
         """Test that truncate() works as expected
@@ -167,7 +207,7 @@ class ChebyshevBoundedFieldTestCase(lsst.utils.tests.TestCase):
         for ctrl, coefficients in self.cases:
             field1 = lsst.afw.math.ChebyshevBoundedField(self.bbox, coefficients)
             field2 = field1.truncate(ctrl)
-            self.assertClose(field1.getCoefficients(), field2.getCoefficients())
+            self.quickClose(field1.getCoefficients(), field2.getCoefficients())
             self.assertEqual(field1.getBBox(), field2.getBBox())
             config3 = lsst.afw.math.ChebyshevBoundedField.ConfigClass()
             config3.readControl(ctrl)
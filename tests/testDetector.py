@@ -24,9 +24,10 @@ from __future__ import absolute_import, division
 """
 Tests for lsst.afw.cameraGeom.Detector
 """
-import itertools
 import unittest
 
+import numpy
+
 import lsst.utils.tests
 import lsst.pex.exceptions
 import lsst.afw.geom as afwGeom
@@ -34,9 +35,31 @@ import lsst.afw.cameraGeom as cameraGeom
 from lsst.afw.cameraGeom.testUtils import DetectorWrapper
 
 class DetectorTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # a detector shared by the tests that do not modify it
+        cls.dw = DetectorWrapper()
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.dw
+
+    def assertPointsAlmostEqual(self, point1, point2):
+        """Assert that two 2-d points are equal to 7 decimal places, as assertAlmostEqual does for scalars
+        """
+        self.assertPointListsAlmostEqual([point1], [point2])
+
+    def assertPointListsAlmostEqual(self, pointList1, pointList2):
+        """Assert that two lists of 2-d points have the same length and are equal to 7 decimal places
+        """
+        self.assertEqual(len(pointList1), len(pointList2))
+        numpy.testing.assert_allclose([[p[0], p[1]] for p in pointList1], [[p[0], p[1]] for p in pointList2],
+                                      rtol=0, atol=0.5e-7)
+
     def testBasics(self):
         """Test getters and other basics
         """
+        # use a new detector, since this test checks what survives deleting it
         dw = DetectorWrapper()
         detector = dw.detector
         for methodName in ("begin", "end", "size"):
@@ -47,9 +70,8 @@ class DetectorTestCase(unittest.TestCase):
         self.assertEquals(dw.type,   detector.getType())
         self.assertEquals(dw.serial, detector.getSerial())
         bbox = detector.getBBox()
-        for i in range(2):
-            self.assertEquals(bbox.getMin()[i], dw.bbox.getMin()[i])
-            self.assertEquals(bbox.getMax()[i], dw.bbox.getMax()[i])
+        self.assertEquals(bbox.getMin(), dw.bbox.getMin())
+        self.assertEquals(bbox.getMax(), dw.bbox.getMax())
         self.assertAlmostEquals(dw.pixelSize, detector.getPixelSize())
         self.assertEquals(len(detector), len(dw.ampInfo))
 
@@ -87,24 +109,26 @@ class DetectorTestCase(unittest.TestCase):
     def testTransform(self):
         """Test the transform method
         """
-        dw = DetectorWrapper()
+        dw = self.dw
         pixOffset = dw.orientation.getReferencePoint()
-        for xyMM in ((25.6, -31.07), (0, 0), (-1.234e5, 3.123e4)):
+        xyMMArr = numpy.array(((25.6, -31.07), (0, 0), (-1.234e5, 3.123e4)))
+        # predicted pixel positions of all points, computed at once
+        scale = numpy.array([dw.pixelSize[i] for i in range(2)])
+        offset = numpy.array([pixOffset[i] for i in range(2)])
+        predPixArr = xyMMArr/scale + offset
+        for xyMM, predPix in zip(xyMMArr, predPixArr):
             fpPoint = afwGeom.Point2D(*xyMM)
             fpCamPoint = cameraGeom.CameraPoint(fpPoint, cameraGeom.FOCAL_PLANE)
             pixCamPoint = dw.detector.transform(fpCamPoint, cameraGeom.PIXELS)
             pixPoint = pixCamPoint.getPoint()
-            for i in range(2):
-                self.assertAlmostEquals(fpPoint[i]/dw.pixelSize[i] + pixOffset[i], pixPoint[i])
+            self.assertPointsAlmostEqual(predPix, pixPoint)
             fpCamPoint2 = dw.detector.transform(pixCamPoint, cameraGeom.FOCAL_PLANE)
             fpPoint2 = fpCamPoint2.getPoint()
-            for i in range(2):
-                self.assertAlmostEquals(fpPoint[i], fpPoint2[i])
+            self.assertPointsAlmostEqual(fpPoint, fpPoint2)
 
             # test pix to pix
             pixCamPoint2 = dw.detector.transform(pixCamPoint, cameraGeom.PIXELS)
-            for i in range(2):
-                self.assertAlmostEquals(pixCamPoint.getPoint()[i], pixCamPoint2.getPoint()[i])
+            self.assertPointsAlmostEqual(pixCamPoint.getPoint(), pixCamPoint2.getPoint())
 
         # make sure you cannot transform to a different detector
         pixCamPoint = dw.detector.makeCameraPoint(afwGeom.Point2D(1, 1), cameraGeom.PIXELS)
@@ -114,7 +138,7 @@ class DetectorTestCase(unittest.TestCase):
     def testIteration(self):
         """Test iteration over amplifiers and __getitem__
         """
-        dw = DetectorWrapper()
+        dw = self.dw
         ampList = [amp for amp in dw.detector]
         self.assertEquals(len(ampList), len(dw.ampInfo))
         for i, amp in enumerate(ampList):
@@ -125,7 +149,7 @@ class DetectorTestCase(unittest.TestCase):
     def testTransformAccess(self):
         """Test hasTransform and getTransform
         """
-        detector = DetectorWrapper().detector
+        detector = self.dw.detector
         for camSys in (cameraGeom.FOCAL_PLANE, cameraGeom.PIXELS, cameraGeom.TAN_PIXELS):
             # camSys may be a CameraSys or a CameraSysPrefix
             fullCamSys = detector.makeCameraSys(camSys)
@@ -144,71 +168,95 @@ class DetectorTestCase(unittest.TestCase):
     def testMakeCameraPoint(self):
         """Test the makeCameraPoint method
         """
-        dw = DetectorWrapper()
+        dw = self.dw
+        detector = dw.detector
+        sysNames = ("csys1", "csys2")
+        # the camera systems do not depend on the point, so make them once
+        cameraSysList = [cameraGeom.CameraSys(sysName, detectorName)
+                         for sysName in sysNames
+                         for detectorName in ("", dw.name, "a different detector")]
+        cameraSysPrefixList = [(cameraGeom.CameraSysPrefix(sysName), cameraGeom.CameraSys(sysName, dw.name))
+                               for sysName in sysNames]
         for xyMM in ((25.6, -31.07), (0, 0)):
             point = afwGeom.Point2D(*xyMM)
-            for sysName in ("csys1", "csys2"):
-                for detectorName in ("", dw.name, "a different detector"):
-                    cameraSys1 = cameraGeom.CameraSys(sysName, detectorName)
-                    cameraPoint1 = dw.detector.makeCameraPoint(point, cameraSys1)
+            for cameraSys1 in cameraSysList:
+                cameraPoint1 = detector.makeCameraPoint(point, cameraSys1)
 
-                    self.assertEquals(cameraPoint1.getPoint(), point)
-                    self.assertEquals(cameraPoint1.getCameraSys(), cameraSys1)
+                self.assertEquals(cameraPoint1.getPoint(), point)
+                self.assertEquals(cameraPoint1.getCameraSys(), cameraSys1)
 
-                cameraSysPrefix = cameraGeom.CameraSysPrefix(sysName)
-                cameraPoint2 = dw.detector.makeCameraPoint(point, cameraSysPrefix)
-                predCameraSys2 = cameraGeom.CameraSys(sysName, dw.name)
+            for cameraSysPrefix, predCameraSys2 in cameraSysPrefixList:
+                cameraPoint2 = detector.makeCameraPoint(point, cameraSysPrefix)
                 self.assertEquals(cameraPoint2.getPoint(), point)
                 self.assertEquals(cameraPoint2.getCameraSys(), predCameraSys2)
 
     def testMakeCameraSys(self):
         """Test the makeCameraSys method
         """
-        dw = DetectorWrapper()
+        dw = self.dw
+        makeCameraSys = dw.detector.makeCameraSys
         for sysName in ("csys1", "csys2"):
             for detectorName in ("", dw.name, "a different detector"):
                 inCamSys = cameraGeom.CameraSys(sysName, detectorName)
-                outCamSys = dw.detector.makeCameraSys(inCamSys)
+                outCamSys = makeCameraSys(inCamSys)
                 self.assertEquals(inCamSys, outCamSys)
 
             inCamSysPrefix = cameraGeom.CameraSysPrefix(sysName)
-            outCamSys2 = dw.detector.makeCameraSys(inCamSysPrefix)
+            outCamSys2 = makeCameraSys(inCamSysPrefix)
             self.assertEquals(outCamSys2, cameraGeom.CameraSys(sysName, dw.name))
 
-    def testGetCorners(self):
-        """Test the getCorners method
+    def checkGetCorners(self, cameraSys):
+        """Test the getCorners method for one camera system
         """
-        dw = DetectorWrapper()
-        for cameraSys in (cameraGeom.FOCAL_PLANE, cameraGeom.PIXELS):
-            cornerList = dw.detector.getCorners(cameraSys)
-            for fromPoint, toPoint in itertools.izip(afwGeom.Box2D(dw.bbox).getCorners(), cornerList):
-                predToCameraPoint = dw.detector.transform(
-                    dw.detector.makeCameraPoint(fromPoint, cameraGeom.PIXELS),
-                    cameraSys,
-                )
-                predToPoint = predToCameraPoint.getPoint()
-                self.assertEquals(predToCameraPoint.getCameraSys().getSysName(), cameraSys.getSysName())
-                for i in range(2):
-                    self.assertAlmostEquals(predToPoint[i], toPoint[i])
-                    if cameraSys == cameraGeom.PIXELS:
-                        self.assertAlmostEquals(fromPoint[i], toPoint[i])
-
-    def testGetCenter(self):
-        """Test the getCenter method
+        dw = self.dw
+        cornerList = dw.detector.getCorners(cameraSys)
+        fromPointList = afwGeom.Box2D(dw.bbox).getCorners()
+        predToPointList = []
+        for fromPoint in fromPointList:
+            predToCameraPoint = dw.detector.transform(
+                dw.detector.makeCameraPoint(fromPoint, cameraGeom.PIXELS),
+                cameraSys,
+            )
+            self.assertEquals(predToCameraPoint.getCameraSys().getSysName(), cameraSys.getSysName())
+            predToPointList.append(predToCameraPoint.getPoint())
+        self.assertPointListsAlmostEqual(predToPointList, cornerList)
+        if cameraSys == cameraGeom.PIXELS:
+            self.assertPointListsAlmostEqual(fromPointList, cornerList)
+
+    def testGetCornersFocalPlane(self):
+        """Test the getCorners method for FOCAL_PLANE
         """
-        dw = DetectorWrapper()
+        self.checkGetCorners(cameraGeom.FOCAL_PLANE)
+
+    def testGetCornersPixels(self):
+        """Test the getCorners method for PIXELS
+        """
+        self.checkGetCorners(cameraGeom.PIXELS)
+
+    def checkGetCenter(self, cameraSys):
+        """Test the getCenter method for one camera system
+        """
+        dw = self.dw
         ctrPixPoint = afwGeom.Box2D(dw.detector.getBBox()).getCenter()
         ctrPixCameraPoint = dw.detector.makeCameraPoint(ctrPixPoint, cameraGeom.PIXELS)
-        for cameraSys in (cameraGeom.FOCAL_PLANE, cameraGeom.PIXELS):
-            ctrCameraPoint = dw.detector.getCenter(cameraSys)
-            self.assertEquals(ctrCameraPoint.getCameraSys().getSysName(), cameraSys.getSysName())
-            ctrPoint = ctrCameraPoint.getPoint()
-            predCtrCameraPoint = dw.detector.transform(ctrPixCameraPoint, cameraSys)
-            predCtrPoint = predCtrCameraPoint.getPoint()
-            for i in range(2):
-                self.assertAlmostEquals(ctrPoint[i], predCtrPoint[i])
-                if cameraSys == cameraGeom.PIXELS:
-                    self.assertAlmostEquals(ctrPixPoint[i], ctrPoint[i])
+        ctrCameraPoint = dw.detector.getCenter(cameraSys)
+        self.assertEquals(ctrCameraPoint.getCameraSys().getSysName(), cameraSys.getSysName())
+        ctrPoint = ctrCameraPoint.getPoint()
+        predCtrCameraPoint = dw.detector.transform(ctrPixCameraPoint, cameraSys)
+        predCtrPoint = predCtrCameraPoint.getPoint()
+        self.assertPointsAlmostEqual(ctrPoint, predCtrPoint)
+        if cameraSys == cameraGeom.PIXELS:
+            self.assertPointsAlmostEqual(ctrPixPoint, ctrPoint)
+
+    def testGetCenterFocalPlane(self):
+        """Test the getCenter method for FOCAL_PLANE
+        """
+        self.checkGetCenter(cameraGeom.FOCAL_PLANE)
+
+    def testGetCenterPixels(self):
+        """Test the getCenter method for PIXELS
+        """
+        self.checkGetCenter(cameraGeom.PIXELS)
 
 
 def suite():
@@ -39,6 +39,7 @@ import numpy
 import lsst.utils.tests
 import lsst.pex.exceptions
 import lsst.daf.base
+import lsst.afw.fits
 import lsst.afw.table
 import lsst.afw.geom
 import lsst.afw.coord
@@ -46,19 +47,28 @@ import lsst.afw.image
 import lsst.afw.detection
 from testTableArchivesLib import DummyPsf
 
-numpy.random.seed(1)
-
 try:
     type(display)
 except NameError:
     display = False
 
+def boxContains(box, points):
+    """Return a boolean array that is True for each point contained in box, as box.contains(point) would
+
+    @param[in] box  box (an lsst.afw.geom.Box2D), which contains its minimum but not its maximum
+    @param[in] points  points, as a NumPy array of shape (N, 2)
+    """
+    return ((points[:, 0] >= box.getMinX()) & (points[:, 0] < box.getMaxX())
+            & (points[:, 1] >= box.getMinY()) & (points[:, 1] < box.getMaxY()))
+
 #-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
 
 class ExposureTableTestCase(unittest.TestCase):
 
     @staticmethod
     def createWcs():
+        """Create the WCS shared by the tests; called once, by setUpClass
+        """
         metadata = lsst.daf.base.PropertySet()
         metadata.set("SIMPLE",                    "T")
         metadata.set("BITPIX",                  -32)
@@ -86,29 +96,44 @@ class ExposureTableTestCase(unittest.TestCase):
         self.assert_(psf2 is not None)
         self.assertEqual(psf1.getValue(), psf2.getValue())
 
-    def setUp(self):
-        schema = lsst.afw.table.ExposureTable.makeMinimalSchema()
-        self.ka = schema.addField("a", type=float, doc="doc for a")
-        self.kb = schema.addField("b", type=int, doc="doc for b")
-        self.cat = lsst.afw.table.ExposureCatalog(schema)
-        self.wcs = self.createWcs()
-        self.psf = DummyPsf(2.0)
-        self.bbox0 = lsst.afw.geom.Box2I(
+    @classmethod
+    def setUpClass(cls):
+        # the schema, WCS, PSF, boxes and calib are not modified by the tests, so they are shared
+        cls.schema = lsst.afw.table.ExposureTable.makeMinimalSchema()
+        cls.ka = cls.schema.addField("a", type=float, doc="doc for a")
+        cls.kb = cls.schema.addField("b", type=int, doc="doc for b")
+        cls.wcs = cls.createWcs()
+        cls.psf = DummyPsf(2.0)
+        cls.bbox0 = lsst.afw.geom.Box2I(
             lsst.afw.geom.Box2D(
-                self.wcs.getPixelOrigin() - lsst.afw.geom.Extent2D( 5.0,  4.0),
-                self.wcs.getPixelOrigin() + lsst.afw.geom.Extent2D(20.0, 30.0)
+                cls.wcs.getPixelOrigin() - lsst.afw.geom.Extent2D( 5.0,  4.0),
+                cls.wcs.getPixelOrigin() + lsst.afw.geom.Extent2D(20.0, 30.0)
                 )
             )
-        self.bbox1 = lsst.afw.geom.Box2I(
+        cls.bbox1 = lsst.afw.geom.Box2I(
             lsst.afw.geom.Box2D(
-                self.wcs.getPixelOrigin() - lsst.afw.geom.Extent2D(15.0, 40.0),
-                self.wcs.getPixelOrigin() + lsst.afw.geom.Extent2D( 3.0,  6.0)
+                cls.wcs.getPixelOrigin() - lsst.afw.geom.Extent2D(15.0, 40.0),
+                cls.wcs.getPixelOrigin() + lsst.afw.geom.Extent2D( 3.0,  6.0)
                 )
             )
-        self.calib = lsst.afw.image.Calib()
-        self.calib.setFluxMag0(56.0, 2.2)
-        self.calib.setExptime(50.0)
-        self.calib.setMidTime(lsst.daf.base.DateTime.now())
+        cls.calib = lsst.afw.image.Calib()
+        cls.calib.setFluxMag0(56.0, 2.2)
+        cls.calib.setExptime(50.0)
+        cls.calib.setMidTime(lsst.daf.base.DateTime.now())
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.schema
+        del cls.ka
+        del cls.kb
+        del cls.wcs
+        del cls.psf
+        del cls.bbox0
+        del cls.bbox1
+        del cls.calib
+
+    def setUp(self):
+        self.cat = lsst.afw.table.ExposureCatalog(self.schema)
         record0 = self.cat.addNew()
         record0.setId(1)
         record0.set(self.ka, numpy.pi)
@@ -126,9 +151,6 @@ class ExposureTableTestCase(unittest.TestCase):
 
     def tearDown(self):
         del self.cat
-        del self.psf
-        del self.wcs
-        del self.calib
 
     def testAccessors(self):
         record0 = self.cat[0]
@@ -140,30 +162,34 @@ class ExposureTableTestCase(unittest.TestCase):
         self.assertEqual(record0.getBBox(), self.bbox0)
         self.assertEqual(record1.getBBox(), self.bbox1)
         self.comparePsfs(record0.getPsf(), self.psf)
-        self.assertEqual(record1.getPsf(), None)
+        self.assertIsNone(record1.getPsf())
         self.assertEqual(record0.getCalib(), self.calib)
-        self.assertTrue(record1.getCalib() is None)
+        self.assertIsNone(record1.getCalib())
 
     def testPersistence(self):
-        with lsst.utils.tests.getTempFilePath(".fits") as tmpFile:
-            self.cat.writeFits(tmpFile)
-            cat1 = lsst.afw.table.ExposureCatalog.readFits(tmpFile)
-            self.assertEqual(self.cat[0].get(self.ka), cat1[0].get(self.ka))
-            self.assertEqual(self.cat[0].get(self.kb), cat1[0].get(self.kb))
-            self.comparePsfs(self.cat[0].getPsf(), cat1[0].getPsf())
-            self.assertEqual(self.cat[0].getWcs(), cat1[0].getWcs())
-            self.assertEqual(self.cat[1].get(self.ka), cat1[1].get(self.ka))
-            self.assertEqual(self.cat[1].get(self.kb), cat1[1].get(self.kb))
-            self.assertEqual(self.cat[1].getWcs(), cat1[1].getWcs())
-            self.assertTrue(self.cat[1].getPsf() is None)
-            self.assertTrue(self.cat[1].getCalib() is None)
-            self.assertEqual(self.cat[0].getWcs().getId(), self.cat[1].getWcs().getId()) # compare citizen IDs
-            self.assertEqual(self.cat[0].getCalib(), cat1[0].getCalib())
+        manager = lsst.afw.fits.MemFileManager()
+        self.cat.writeFits(manager)
+        cat1 = lsst.afw.table.ExposureCatalog.readFits(manager)
+        record0, record1 = self.cat[0], self.cat[1]
+        outRecord0, outRecord1 = cat1[0], cat1[1]
+        wcs0 = record0.getWcs()
+        self.assertEqual(record0.get(self.ka), outRecord0.get(self.ka))
+        self.assertEqual(record0.get(self.kb), outRecord0.get(self.kb))
+        self.comparePsfs(record0.getPsf(), outRecord0.getPsf())
+        self.assertEqual(wcs0, outRecord0.getWcs())
+        self.assertEqual(record1.get(self.ka), outRecord1.get(self.ka))
+        self.assertEqual(record1.get(self.kb), outRecord1.get(self.kb))
+        self.assertEqual(record1.getWcs(), outRecord1.getWcs())
+        self.assertIsNone(outRecord1.getPsf())
+        self.assertIsNone(outRecord1.getCalib())
+        self.assertEqual(wcs0.getId(), record1.getWcs().getId()) # compare citizen IDs
+        self.assertEqual(record0.getCalib(), outRecord0.getCalib())
 
     def testGeometry(self):
         bigBox = lsst.afw.geom.Box2D(lsst.afw.geom.Box2I(self.bbox0))
         bigBox.include(lsst.afw.geom.Box2D(self.bbox1))
-        points = (numpy.random.rand(100, 2) * numpy.array([bigBox.getWidth(), bigBox.getHeight()])
+        rng = numpy.random.RandomState(1)
+        points = (rng.rand(100, 2) * numpy.array([bigBox.getWidth(), bigBox.getHeight()])
                   + numpy.array([bigBox.getMinX(), bigBox.getMinY()]))
 
         # make a very slightly perturbed wcs so the celestial transform isn't a no-op
@@ -174,19 +200,23 @@ class ExposureTableTestCase(unittest.TestCase):
             crval2.getPosition(), self.wcs.getPixelOrigin() + lsst.afw.geom.Extent2D(30.0, -50.0),
             self.wcs.getCDMatrix() * 1.1
             )
-        for x1, y1 in points:
+        # which points each record's bbox contains; [i, j] is record i, point j
+        insideArr = [boxContains(lsst.afw.geom.Box2D(record.getBBox()), points) for record in self.cat]
+        pixelToSky = self.wcs.pixelToSky
+        for j, (x1, y1) in enumerate(points):
             p1 = lsst.afw.geom.Point2D(x1, y1)
-            c = self.wcs.pixelToSky(x1, y1)
+            c = pixelToSky(x1, y1)
             p2 = wcs2.skyToPixel(c)
-            subset1 = self.cat.subsetContaining(c)
-            subset2 = self.cat.subsetContaining(p2, wcs2)
-            for record in self.cat:
-                inside = lsst.afw.geom.Box2D(record.getBBox()).contains(p1)
+            # IDs of the records in each subset, for fast membership tests (the IDs are unique)
+            subset1Ids = set(record.getId() for record in self.cat.subsetContaining(c))
+            subset2Ids = set(record.getId() for record in self.cat.subsetContaining(p2, wcs2))
+            for i, record in enumerate(self.cat):
+                inside = bool(insideArr[i][j])
                 self.assertEqual(inside, record.contains(c))
                 self.assertEqual(inside, record.contains(p2, wcs2))
                 self.assertEqual(inside, record.contains(p1, self.wcs))
-                self.assertEqual(inside, record in subset1)
-                self.assertEqual(inside, record in subset2)
+                self.assertEqual(inside, record.getId() in subset1Ids)
+                self.assertEqual(inside, record.getId() in subset2Ids)
 
         crazyPoint = lsst.afw.coord.IcrsCoord(crval2.getLongitude() + numpy.pi * lsst.afw.geom.radians,
                                               crval2.getLatitude())
@@ -203,15 +233,15 @@ class ExposureTableTestCase(unittest.TestCase):
         coaddInputs.ccds.addNew().setId(4)
         exposureIn = lsst.afw.image.ExposureF(10, 10)
         exposureIn.getInfo().setCoaddInputs(coaddInputs)
-        with lsst.utils.tests.getTempFilePath(".fits") as filename:
-            exposureIn.writeFits(filename)
-            exposureOut = lsst.afw.image.ExposureF(filename)
-            coaddInputsOut = exposureOut.getInfo().getCoaddInputs()
-            self.assertEqual(len(coaddInputsOut.visits), 1)
-            self.assertEqual(len(coaddInputsOut.ccds), 2)
-            self.assertEqual(coaddInputsOut.visits[0].getId(), 2)
-            self.assertEqual(coaddInputsOut.ccds[0].getId(), 3)
-            self.assertEqual(coaddInputsOut.ccds[1].getId(), 4)
+        manager = lsst.afw.fits.MemFileManager()
+        exposureIn.writeFits(manager)
+        exposureOut = lsst.afw.image.ExposureF(manager)
+        coaddInputsOut = exposureOut.getInfo().getCoaddInputs()
+        self.assertEqual(len(coaddInputsOut.visits), 1)
+        self.assertEqual(len(coaddInputsOut.ccds), 2)
+        self.assertEqual(coaddInputsOut.visits[0].getId(), 2)
+        self.assertEqual(coaddInputsOut.ccds[0].getId(), 3)
+        self.assertEqual(coaddInputsOut.ccds[1].getId(), 4)
 
 #-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
 
@@ -34,6 +34,7 @@ or
 import os
 import unittest
 import lsst.utils.tests as utilsTests
+import lsst.afw.fits as afwFits
 import lsst.afw.geom as afwGeom
 import lsst.afw.image as afwImage
 import lsst.afw.table as afwTable
@@ -51,49 +52,44 @@ class ValidPolygonTestCase(utilsTests.TestCase):
         y=[0,10,10,0]
         self.polygon=Polygon([afwGeom.Point2D(xc,yc) for xc,yc in zip(x,y)])
 
+    def checkPersistence(self, write, read):
+        """Check that self.polygon survives a round trip through FITS
+
+        @param[in] write  function that writes an object holding self.polygon to a MemFileManager
+        @param[in] read  function that reads the object back from a MemFileManager, returning its polygon
+        """
+        manager = afwFits.MemFileManager()
+        write(manager)
+        polygon2 = read(manager)
+        self.assertEqual(self.polygon, polygon2)
+
     def testPersistence(self):
         """Test that we can round-trip an ValidPolygon through FITS persistence."""
-        filename = "testValidPolygon.fits"
-        self.polygon.writeFits(filename)
-        polygon2 = Polygon.readFits(filename)
-        self.assertEqual(self.polygon, polygon2)
-        os.remove(filename)
+        self.checkPersistence(self.polygon.writeFits, Polygon.readFits)
 
     def testExposurePersistence(self):
         """Test that the ValidPolygon is saved with an Exposure"""
-        filename = "testValidPolygon.fits"
         exposure1 = afwImage.ExposureF(self.bbox)
         exposure1.getInfo().setValidPolygon(self.polygon)
-        exposure1.writeFits(filename)
-        exposure2 = afwImage.ExposureF(filename)
-        polygon2 = exposure2.getInfo().getValidPolygon()
-        self.assertEqual(self.polygon, polygon2)
-        os.remove(filename)
+        self.checkPersistence(exposure1.writeFits,
+                              lambda manager: afwImage.ExposureF(manager).getInfo().getValidPolygon())
 
     def testExposureRecordPersistence(self):
         """Test that the ValidPolygon is saved with an ExposureRecord"""
-        filename = "testValidPolygon.fits"
         cat1 = afwTable.ExposureCatalog(afwTable.ExposureTable.makeMinimalSchema())
         record1 = cat1.addNew()
         record1.setValidPolygon(self.polygon)
-        cat1.writeFits(filename)
-        cat2 = afwTable.ExposureCatalog.readFits(filename)
-        record2 = cat2[0]
-        polygon2 = record2.getValidPolygon()
-        self.assertEqual(self.polygon, polygon2)
-        os.remove(filename)
+        self.checkPersistence(cat1.writeFits,
+                              lambda manager: afwTable.ExposureCatalog.readFits(manager)[0].getValidPolygon())
 
     def testExposureCatalogBackwardsCompatibility(self):
         """Test that we can read an ExposureCatalog written with an old version of the code."""
-        filename = os.path.join(os.environ["AFW_DIR"], "tests", "data", "version-0-ExposureCatalog.fits")
-        cat = afwTable.ExposureCatalog.readFits(filename)
-        record = cat[0]
-        self.assertIsNone(record.getValidPolygon())
-
-        filename2 = os.path.join(os.environ["AFW_DIR"], "tests", "data", "version-1-ExposureCatalog.fits")
-        cat2 = afwTable.ExposureCatalog.readFits(filename2)
-        record2 = cat2[0]
-        self.assertIsNone(record2.getValidPolygon())
+        dataDir = os.path.join(os.environ["AFW_DIR"], "tests", "data")
+        for version in (0, 1):
+            filename = os.path.join(dataDir, "version-%d-ExposureCatalog.fits" % (version,))
+            cat = afwTable.ExposureCatalog.readFits(filename)
+            record = cat[0]
+            self.assertIsNone(record.getValidPolygon())
 
 #-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-
 